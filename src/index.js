@@ -1,11 +1,29 @@
 const MODEL = 'llama-3.3-70b-versatile';
 const GROQ_URL = 'https://api.groq.com/openai/v1/chat/completions';
 const SKIP_PATHS = new Set(['', 'favicon.ico', 'robots.txt']);
+const CACHE_MAX_ENTRIES = 256;
+const CACHE_TTL_MS = 7 * 24 * 60 * 60 * 1000;
 
 // ---------------------------------------------------------------------------
 // User-Agent → system / shell detection
 // ---------------------------------------------------------------------------
 
+// Checked in order; the first matching pattern wins.
+const DISTROS = Object.freeze([
+  { pattern: /kali/i,       distro: 'Kali Linux',  shell: 'bash' },
+  { pattern: /ubuntu/i,     distro: 'Ubuntu',       shell: 'bash' },
+  { pattern: /fedora/i,     distro: 'Fedora',       shell: 'bash' },
+  { pattern: /arch/i,       distro: 'Arch Linux',   shell: 'bash' },
+  { pattern: /centos/i,     distro: 'CentOS',       shell: 'bash' },
+  { pattern: /rhel|red\s?hat/i, distro: 'RHEL',     shell: 'bash' },
+  { pattern: /alpine/i,     distro: 'Alpine Linux', shell: 'ash'  },
+  { pattern: /suse|sles/i,  distro: 'openSUSE',     shell: 'bash' },
+  { pattern: /debian/i,     distro: 'Debian',       shell: 'bash' },
+  { pattern: /manjaro/i,    distro: 'Manjaro',      shell: 'bash' },
+  { pattern: /mint/i,       distro: 'Linux Mint',   shell: 'bash' },
+  { pattern: /gentoo/i,     distro: 'Gentoo',       shell: 'bash' },
+].map(Object.freeze));
+
 /**
  * Lightweight heuristic that inspects a User-Agent string and returns a best-
  * guess { os, shell, detail } object.  When detection fails the default is
@@ -40,22 +58,7 @@ function detectSystem(ua) {
   }
 
   // — Linux distros —
-  const distros = [
-    { pattern: /kali/i,       distro: 'Kali Linux',  shell: 'bash' },
-    { pattern: /ubuntu/i,     distro: 'Ubuntu',       shell: 'bash' },
-    { pattern: /fedora/i,     distro: 'Fedora',       shell: 'bash' },
-    { pattern: /arch/i,       distro: 'Arch Linux',   shell: 'bash' },
-    { pattern: /centos/i,     distro: 'CentOS',       shell: 'bash' },
-    { pattern: /rhel|red\s?hat/i, distro: 'RHEL',     shell: 'bash' },
-    { pattern: /alpine/i,     distro: 'Alpine Linux', shell: 'ash'  },
-    { pattern: /suse|sles/i,  distro: 'openSUSE',     shell: 'bash' },
-    { pattern: /debian/i,     distro: 'Debian',       shell: 'bash' },
-    { pattern: /manjaro/i,    distro: 'Manjaro',      shell: 'bash' },
-    { pattern: /mint/i,       distro: 'Linux Mint',   shell: 'bash' },
-    { pattern: /gentoo/i,     distro: 'Gentoo',       shell: 'bash' },
-  ];
-
-  for (const d of distros) {
+  for (const d of DISTROS) {
     if (d.pattern.test(ua)) {
       return { os: 'Linux', distro: d.distro, shell: d.shell, detail: d.distro };
     }
@@ -75,51 +78,104 @@ function detectSystem(ua) {
   return { os: 'Linux', distro: 'Debian', shell: 'bash', detail: 'unrecognised agent — defaulting to Debian' };
 }
 
+// Shared by every system prompt.  Kept first and byte-identical so that
+// provider-side prompt prefix caching can match it across requests.
+const PROMPT_PREFIX =
+  'You are a shell command generator. ' +
+  'Output ONLY the exact shell command. No explanations, no markdown, ' +
+  'no code blocks, no backticks, no commentary. Just the raw command. ';
+
+// detectSystem() only yields a fixed set of { distro, os, shell } triples,
+// so the prompt for each is built once and reused.
+const systemPrompts = new Map();
+
 /**
  * Build the dynamic system prompt using the detected system info.
  */
 function buildSystemPrompt(sys) {
-  return (
-    `You are a shell command generator for ${sys.distro} (${sys.os}) running ${sys.shell}. ` +
-    'Output ONLY the exact shell command. No explanations, no markdown, ' +
-    'no code blocks, no backticks, no commentary. Just the raw command. ' +
-    (sys.shell === 'powershell'
-      ? 'If multiple commands are needed, chain them with ; or use pipelines.'
-      : sys.shell === 'cmd'
-        ? 'If multiple commands are needed, chain them with & or &&.'
-        : 'If multiple commands are needed, chain them with && or ;.')
-  );
+  const key = `${sys.distro}|${sys.os}|${sys.shell}`;
+  let prompt = systemPrompts.get(key);
+  if (prompt === undefined) {
+    prompt =
+      PROMPT_PREFIX +
+      `Target system: ${sys.distro} (${sys.os}) running ${sys.shell}. ` +
+      (sys.shell === 'powershell'
+        ? 'If multiple commands are needed, chain them with ; or use pipelines.'
+        : sys.shell === 'cmd'
+          ? 'If multiple commands are needed, chain them with & or &&.'
+          : 'If multiple commands are needed, chain them with && or ;.');
+    systemPrompts.set(key, prompt);
+  }
+  return prompt;
 }
 
 // ---------------------------------------------------------------------------
 // Helpers
 // ---------------------------------------------------------------------------
 
+const FENCE_RE = /```\w*\n?/g;
+const EDGE_BACKTICKS_RE = /^`+|`+$/g;
+
 function cleanResponse(text) {
+  // Most replies are already bare commands; skip the regex passes for them.
+  if (!text.includes('`')) return text.trim();
   return text
-    .replace(/```[\w]*\n?/g, '')
-    .replace(/^`+|`+$/g, '')
+    .replace(FENCE_RE, '')
+    .replace(EDGE_BACKTICKS_RE, '')
     .trim();
 }
 
+// Per-isolate cache of generated commands, keyed by the exact Groq request
+// body.  Map iteration order doubles as LRU order: hits are re-inserted at
+// the end and the oldest entry is evicted once the cap is reached.
+const commandCache = new Map();
+
+function cacheGet(key) {
+  const entry = commandCache.get(key);
+  if (!entry) return null;
+  commandCache.delete(key);
+  if (entry.expires < Date.now()) return null;
+  commandCache.set(key, entry);
+  return entry.command;
+}
+
+function cachePut(key, command) {
+  commandCache.delete(key);
+  if (commandCache.size >= CACHE_MAX_ENTRIES) {
+    commandCache.delete(commandCache.keys().next().value);
+  }
+  commandCache.set(key, { command, expires: Date.now() + CACHE_TTL_MS });
+}
+
+function commandResponse(command, sys, cacheStatus) {
+  return new Response(command + '\n', {
+    headers: {
+      'Content-Type': 'text/plain; charset=utf-8',
+      'Cache-Control': 'no-cache',
+      'X-Detected-System': `${sys.distro} (${sys.shell})`,
+      'X-Vox-Cache': cacheStatus,
+    },
+  });
+}
+
+const USAGE_TEXT = [
+  'vox — natural language to shell commands',
+  '',
+  'Usage:',
+  '  curl "https://vox.workers.dev/list all files"',
+  '  curl "https://vox.workers.dev/find python files modified today"',
+  '  curl "https://vox.workers.dev/compress this folder to tar.gz"',
+  '  curl "https://vox.workers.dev/show disk usage sorted by size"',
+  '  curl "https://vox.workers.dev/kill process on port 3000"',
+  '',
+  'The system your request agent reports is auto-detected (default: Debian).',
+  '',
+  'Source: https://github.com/almas-cp/vox',
+  '',
+].join('\n');
+
 function usagePage() {
-  const text = [
-    'vox — natural language to shell commands',
-    '',
-    'Usage:',
-    '  curl "https://vox.workers.dev/list all files"',
-    '  curl "https://vox.workers.dev/find python files modified today"',
-    '  curl "https://vox.workers.dev/compress this folder to tar.gz"',
-    '  curl "https://vox.workers.dev/show disk usage sorted by size"',
-    '  curl "https://vox.workers.dev/kill process on port 3000"',
-    '',
-    'The system your request agent reports is auto-detected (default: Debian).',
-    '',
-    'Source: https://github.com/almas-cp/vox',
-    '',
-  ].join('\n');
-
-  return new Response(text, {
+  return new Response(USAGE_TEXT, {
     headers: { 'Content-Type': 'text/plain; charset=utf-8' },
   });
 }
@@ -131,7 +187,7 @@ function usagePage() {
 export default {
   async fetch(request, env) {
     const url = new URL(request.url);
-    const query = decodeURIComponent(url.pathname.slice(1)).trim();
+    const query = decodeURIComponent(url.pathname.slice(1)).replace(/\s+/g, ' ').trim();
 
     if (SKIP_PATHS.has(query)) {
       return usagePage();
@@ -147,6 +203,28 @@ export default {
       `[Agent context — User-Agent: "${userAgent}" → detected: ${sys.detail} (${sys.os}/${sys.shell})]\n\n` +
       query;
 
+    const body = JSON.stringify({
+      model: MODEL,
+      messages: [
+        { role: 'system', content: systemPrompt },
+        { role: 'user', content: userMessage },
+      ],
+      max_tokens: 400,
+      temperature: 0,
+    });
+
+    // temperature is 0, so an identical request body yields the same command
+    const useCache = !env.VOX_NO_CACHE;
+    if (useCache) {
+      const cached = cacheGet(body);
+      if (cached) return commandResponse(cached, sys, 'HIT');
+    }
+
+    // Without a key Groq can only answer 401, so skip the round trip
+    if (!env.GROQ_API_KEY) {
+      return new Response('error: GROQ_API_KEY is not configured\n', { status: 500 });
+    }
+
     let apiRes;
     try {
       apiRes = await fetch(GROQ_URL, {
@@ -155,15 +233,7 @@ export default {
           'Content-Type': 'application/json',
           Authorization: `Bearer ${env.GROQ_API_KEY}`,
         },
-        body: JSON.stringify({
-          model: MODEL,
-          messages: [
-            { role: 'system', content: systemPrompt },
-            { role: 'user', content: userMessage },
-          ],
-          max_tokens: 400,
-          temperature: 0,
-        }),
+        body,
       });
     } catch {
       return new Response('error: could not reach groq API\n', { status: 502 });
@@ -188,12 +258,7 @@ export default {
       return new Response('error: empty response, try rephrasing\n', { status: 400 });
     }
 
-    return new Response(command + '\n', {
-      headers: {
-        'Content-Type': 'text/plain; charset=utf-8',
-        'Cache-Control': 'no-cache',
-        'X-Detected-System': `${sys.distro} (${sys.shell})`,
-      },
-    });
+    if (useCache) cachePut(body, command);
+    return commandResponse(command, sys, useCache ? 'MISS' : 'BYPASS');
   },
 };